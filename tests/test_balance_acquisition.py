@@ -0,0 +1,167 @@
+##
+# Runs BalanceAcquisition against a mock device whose peak scales linearly with
+# integration time and laser power, so every balance mode is exercised without
+# hardware.
+#
+# Run with "python -m pytest tests" from the repository root.
+
+import time
+import logging
+
+import numpy as np
+import pytest
+
+from wasatch.BalanceAcquisition   import BalanceAcquisition
+from wasatch.SpectrometerSettings import SpectrometerSettings
+from wasatch.Reading              import Reading
+
+INTENSITY = 45000
+THRESHOLD = 2500
+
+class MockHardware(object):
+    def __init__(self, settings):
+        self.settings = settings
+
+    def set_integration_time_ms(self, ms):
+        self.settings.state.integration_time_ms = ms
+
+    def set_laser_power_perc(self, perc):
+        self.settings.state.laser_power_perc = perc
+
+class MockDevice(object):
+
+    ## peak counts = gain * integration_time_ms * laser_power_perc (saturating at 16-bit)
+    #
+    # @param clock  optional one-element list of seconds, advanced by the
+    #               integration time on each acquisition (as if blocking)
+    def __init__(self, integration_time_ms, laser_power_perc, gain=7.5, dtype=np.float64, clock=None):
+        self.settings = SpectrometerSettings()
+        self.settings.state.integration_time_ms = integration_time_ms
+        self.settings.state.laser_power_perc = laser_power_perc
+        self.hardware = MockHardware(self.settings)
+        self.gain = gain
+        self.dtype = dtype
+        self.clock = clock
+        self.acquisitions = 0
+        self.acquired_at = [] # (start, end) clock of each acquisition
+
+    def change_setting(self, setting, value, allow_immediate=True):
+        pass
+
+    def acquire_data(self):
+        self.acquisitions += 1
+        state = self.settings.state
+        if self.clock is not None:
+            start = self.clock[0]
+            self.clock[0] += state.integration_time_ms * 0.001
+            self.acquired_at.append((start, self.clock[0]))
+        peak = min(65535, self.gain * state.integration_time_ms * state.laser_power_perc)
+
+        reading = Reading()
+        reading.spectrum = np.linspace(0, peak, self.settings.pixels()).astype(self.dtype)
+        return reading
+
+    def peak(self):
+        return self.acquire_data().spectrum.max()
+
+def balance(device, mode):
+    balancer = BalanceAcquisition(mode=mode, intensity=INTENSITY, threshold=THRESHOLD, device=device)
+    return balancer.balance()
+
+def test_integration():
+    device = MockDevice(integration_time_ms=20, laser_power_perc=50)
+    assert balance(device, BalanceAcquisition.INTEGRATION)
+    assert device.settings.state.laser_power_perc == 50
+    assert abs(INTENSITY - device.peak()) <= THRESHOLD
+
+def test_laser():
+    device = MockDevice(integration_time_ms=100, laser_power_perc=20)
+    assert balance(device, BalanceAcquisition.LASER)
+    assert device.settings.state.integration_time_ms == 100
+    assert abs(INTENSITY - device.peak()) <= THRESHOLD
+
+def test_laser_then_integration():
+    device = MockDevice(integration_time_ms=100, laser_power_perc=20)
+    assert balance(device, BalanceAcquisition.LASER_THEN_INTEGRATION)
+    assert abs(INTENSITY - device.peak()) <= THRESHOLD
+
+def test_mode_names():
+    device = MockDevice(integration_time_ms=100, laser_power_perc=20)
+    assert balance(device, "laser")
+    assert abs(INTENSITY - device.peak()) <= THRESHOLD
+
+def test_laser_then_integration_skips_confirming_pass():
+    # laser pass lands within threshold // 2: no integration pass acquisition
+    device = MockDevice(integration_time_ms=100, laser_power_perc=50, gain=8.9) # peak 44500
+    assert balance(device, BalanceAcquisition.LASER_THEN_INTEGRATION)
+    assert device.acquisitions == 1
+
+    # laser pass only within threshold: integration pass confirms with one more
+    device = MockDevice(integration_time_ms=100, laser_power_perc=50, gain=8.6) # peak 43000
+    assert balance(device, BalanceAcquisition.LASER_THEN_INTEGRATION)
+    assert device.acquisitions == 2
+
+def test_debug_logging(caplog):
+    caplog.set_level(logging.DEBUG, logger="wasatch.BalanceAcquisition")
+    for mode in (BalanceAcquisition.INTEGRATION, BalanceAcquisition.LASER, BalanceAcquisition.LASER_THEN_INTEGRATION):
+        device = MockDevice(integration_time_ms=100, laser_power_perc=20)
+        assert balance(device, mode)
+    assert "laser_power_perc" in caplog.text
+
+def test_uint16_spectra():
+    # peak 46000 is within threshold above the target; unsigned arithmetic
+    # would wrap delta instead of balancing immediately
+    device = MockDevice(integration_time_ms=100, laser_power_perc=50, gain=9.2, dtype=np.uint16)
+    assert balance(device, BalanceAcquisition.INTEGRATION)
+    assert device.acquisitions == 1
+
+    device = MockDevice(integration_time_ms=20, laser_power_perc=50, dtype=np.uint16)
+    assert balance(device, BalanceAcquisition.INTEGRATION)
+    assert abs(INTENSITY - int(device.peak())) <= THRESHOLD
+
+def fake_clock(monkeypatch):
+    clock = [0.0]
+    sleeps = []
+    def sleep(sec):
+        sleeps.append(sec)
+        clock[0] += sec
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(time, "sleep", sleep)
+    return clock, sleeps
+
+def test_pacing_uses_measured_integration_time(monkeypatch):
+    # 10ms -> 20ms: acquisitions block for their integration time, then pacing
+    # leaves a gap of the 10ms just measured (not the 20ms now configured)
+    clock, sleeps = fake_clock(monkeypatch)
+    device = MockDevice(integration_time_ms=10, laser_power_perc=50, gain=45, clock=clock)
+    assert balance(device, BalanceAcquisition.INTEGRATION)
+    assert device.settings.state.integration_time_ms == 20
+    assert sleeps == [pytest.approx(0.010)]
+    (_, end), (start, _) = device.acquired_at
+    assert start - end == pytest.approx(0.010)
+
+def test_pacing_gap_capped_by_max_backoff(monkeypatch):
+    # 400ms -> 1800ms: the gap after the long acquisition is capped at max_backoff_ms
+    clock, sleeps = fake_clock(monkeypatch)
+    device = MockDevice(integration_time_ms=400, laser_power_perc=50, gain=0.5, clock=clock)
+    assert balance(device, BalanceAcquisition.INTEGRATION)
+    assert sleeps and max(sleeps) == pytest.approx(0.050)
+
+def test_saturated_start_halves():
+    # 1000ms / 2000ms saturate the 16-bit ADC: halve down to ~125ms rather
+    # than taking ~31% proportional steps off a clipped peak
+    for integration_time_ms, expected in ((1000, 4), (2000, 5)):
+        device = MockDevice(integration_time_ms=integration_time_ms, laser_power_perc=50)
+        assert balance(device, BalanceAcquisition.INTEGRATION)
+        assert device.acquisitions == expected
+        assert abs(INTENSITY - device.peak()) <= THRESHOLD
+
+def test_overshoot_count_resets_each_pass():
+    # saturated laser pass halves once; a clean integration pass then reports 0
+    device = MockDevice(integration_time_ms=100, laser_power_perc=100)
+    balancer = BalanceAcquisition(mode=BalanceAcquisition.LASER_THEN_INTEGRATION,
+        intensity=INTENSITY, threshold=THRESHOLD, device=device)
+    assert balancer.balance_pass(BalanceAcquisition.LASER)[0]
+    assert balancer.overshoot_count == 1
+    assert balancer.balance_pass(BalanceAcquisition.INTEGRATION)[0]
+    assert balancer.overshoot_count == 0
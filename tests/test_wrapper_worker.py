@@ -0,0 +1,61 @@
+##
+# Checks how WrapperWorker relays responses once the caller stops polling and
+# the response ring fills: plain Readings may be dropped, but completed
+# averages, errors and poison-pills must still reach the caller.
+#
+# Run with "python -m pytest tests" from the repository root.
+
+from collections import deque
+
+from wasatch.WrapperWorker        import WrapperWorker
+from wasatch.WasatchDeviceWrapper import WasatchDeviceWrapper
+from wasatch.SpectrometerResponse import SpectrometerResponse
+from wasatch.Reading              import Reading
+
+def make_reading(session_count, averaged=False):
+    reading = Reading()
+    reading.session_count = session_count
+    reading.spectrum = [session_count] * 4
+    reading.averaged = averaged
+    return SpectrometerResponse(reading)
+
+def make_wrapper():
+    wrapper = WasatchDeviceWrapper("MOCK:test", "info")
+    wrapper.connected = True
+    worker = WrapperWorker(
+        device_id         = wrapper.device_id,
+        command_queue     = wrapper.command_queue,
+        response_queue    = wrapper.response_queue,
+        settings_queue    = wrapper.settings_queue,
+        message_queue     = wrapper.message_queue,
+        is_ocean          = False,
+        is_andor          = False,
+        is_spi            = False,
+        is_ble            = False,
+        response_overflow = wrapper.response_overflow)
+    return wrapper, worker
+
+def test_full_ring_keeps_completed_and_control_responses(caplog):
+    worker = WrapperWorker("MOCK:test", deque(), deque(maxlen=2), None, None, False, False, False, False)
+    poison = SpectrometerResponse(poison_pill=True)
+    error  = SpectrometerResponse(error_msg="failed")
+    for response in (poison, error, make_reading(1), make_reading(2)):
+        worker.send_response(response)
+
+    assert list(worker.response_overflow) == [poison, error]
+    assert [r.data.session_count for r in worker.response_queue] == [1, 2]
+
+    worker.send_response(make_reading(3))
+    assert [r.data.session_count for r in worker.response_queue] == [2, 3]
+    assert "dropped Reading 1" in caplog.text
+
+def test_keep_complete_survives_stalled_caller():
+    wrapper, worker = make_wrapper()
+    count = 3 * WasatchDeviceWrapper.RESPONSE_RING_SIZE
+    for session_count in range(1, count + 1):
+        worker.send_response(make_reading(session_count, averaged=session_count == 3))
+
+    assert len(wrapper.response_queue) == WasatchDeviceWrapper.RESPONSE_RING_SIZE
+    response = wrapper.acquire_data(WasatchDeviceWrapper.ACQUISITION_MODE_KEEP_COMPLETE)
+    assert response.data.session_count == 3
+    assert not wrapper.response_queue and not wrapper.response_overflow
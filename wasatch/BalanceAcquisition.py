@@ -1,23 +1,77 @@
+import functools
 import logging
-import re
+import numpy as np
+import time
 
 log = logging.getLogger(__name__)
 
+def _clamp(n, lo, hi):
+    return lo if n < lo else (hi if n > hi else n)
+
+##
+# Returns a function extracting the balance peak from a spectrum, specialized
+# for the configured pixel so the balance loop doesn't re-dispatch on its type.
+def _make_peak_func(pixel):
+    if pixel is None:
+        # numpy arrays reduce in C; plain lists fall back to builtin max
+        return lambda spectrum: spectrum.max() if hasattr(spectrum, "max") else max(spectrum)
+    elif isinstance(pixel, int):
+        return lambda spectrum: spectrum[pixel]
+    else:
+        # ROI slice or index array
+        return lambda spectrum: np.asarray(spectrum)[pixel].max()
+
+##
+# Iteratively adjusts integration time and/or laser power until the measured
+# peak lands within threshold of the target intensity.
+#
+# @param pixel  None to balance on the whole-spectrum maximum, an int for a
+#               single pixel, or a slice / sequence of pixel indices to balance
+#               on the maximum within that region of interest
+# @param max_backoff_ms  longest gap left after each acquisition (the gap is
+#               otherwise the integration time just measured)
 class BalanceAcquisition(object):
 
+    __slots__ = ("mode", "intensity", "threshold", "pixel", "device", "max_tries",
+                 "min_integration_time_ms", "max_integration_time_ms", "max_backoff_ms",
+                 "overshoot_count")
+
     INTEGRATION            = 0
     LASER                  = 1
     LASER_THEN_INTEGRATION = 2
 
-    def __init__(self, mode=INTEGRATION, intensity=45000, threshold=2500, pixel=None, device=None, max_integration_time_ms=5000, max_tries=20):
+    # weight of the derivative term damping each proportional step
+    DERIVATIVE_GAIN        = 0.2
+
+    # give up after this many true overshoots in a single pass
+    MAX_OVERSHOOTS         = 5
+
+    # peaks at or above full scale of a 16-bit ADC are clipped, so their
+    # ratio to the target understates the overshoot
+    SATURATION             = 0xffff
+
+    def __init__(self, mode=INTEGRATION, intensity=45000, threshold=2500, pixel=None, device=None, max_integration_time_ms=5000, max_tries=20, max_backoff_ms=50):
         self.mode      = mode
         self.intensity = intensity
         self.threshold = threshold
         self.pixel     = pixel
         self.device    = device
         self.max_tries = max_tries
+        self.max_backoff_ms = max_backoff_ms
+        self.min_integration_time_ms = device.settings.eeprom.min_integration_time_ms
         self.max_integration_time_ms = min(max_integration_time_ms, device.settings.eeprom.max_integration_time_ms)
 
+        self.overshoot_count = 0
+
+        # normalize pixel once so the balance loop can index directly
+        if isinstance(self.pixel, (int, np.integer)):
+            self.pixel = int(self.pixel)
+            pixels = device.settings.pixels()
+            if not (0 <= self.pixel < pixels):
+                raise Exception("BalanceAcquisition pixel %d out of range [0, %d)" % (self.pixel, pixels))
+        elif self.pixel is not None and not isinstance(self.pixel, slice):
+            self.pixel = np.asarray(self.pixel)
+
         if not isinstance(self.mode, int):
             self.mode = self.parse_mode(self.mode)
 
@@ -29,108 +83,150 @@ class BalanceAcquisition(object):
 
     def balance(self):
         if self.using_integ():
-            return self.balance_pass(self.adjust_integration)
+            return self.balance_pass(self.INTEGRATION)[0]
         elif self.using_laser():
-            return self.balance_pass(self.adjust_laser)
+            return self.balance_pass(self.LASER)[0]
         else:
             # due to the way we're halving overshoots, the laser+integration
             # combination likely adds little value over integration alone
-            if not self.balance_pass(self.adjust_laser):
+            ok, peak = self.balance_pass(self.LASER)
+            if not ok:
                 return False
-            return self.balance_pass(self.adjust_integration)
 
-    def balance_pass(self, adjust_func):
+            # if the laser pass landed well inside the threshold, the
+            # integration pass would only re-confirm it with another acquisition
+            # (half-threshold margin avoids oscillating at the boundary)
+            if abs(self.intensity - peak) <= self.threshold // 2:
+                log.debug("laser pass already balanced")
+                return True
+            return self.balance_pass(self.INTEGRATION)[0]
+
+    ##
+    # @param mode  INTEGRATION or LASER (the quantity adjusted by this pass)
+    # @returns tuple of (success, last peak)
+    def balance_pass(self, mode):
         if self.device is None:
             log.error("missing device")
-            return
+            return False, None
+
+        # bind frequently-used attributes to locals for the polling loop
+        device    = self.device
+        settings  = device.settings
+        hardware  = device.hardware
+        intensity = self.intensity
+        threshold = self.threshold
+        get_peak  = _make_peak_func(self.pixel)
+        adjust    = self.adjust
+        debug     = log.isEnabledFor(logging.DEBUG)
+        max_backoff_sec = self.max_backoff_ms * 0.001
+
+        if mode == self.INTEGRATION:
+            value_name = "integration_time_ms"
+            lo, hi     = self.min_integration_time_ms, self.max_integration_time_ms
+            setter     = hardware.set_integration_time_ms
+        else:
+            value_name = "laser_power_perc"
+            lo, hi     = 1, 100
+            setter     = hardware.set_laser_power_perc
 
-        self.overshoot_count = 0
+        overshoot_count = self.overshoot_count = 0
+        prev_delta = None
         try_count = 0
         same_count = 0
         while True:
-            self.device.change_setting("acquire", True, allow_immediate = False)
-            reading = self.device.acquire_data()
+            measured_integration_sec = settings.state.integration_time_ms * 0.001
+            device.change_setting("acquire", True, allow_immediate = False)
+            reading = device.acquire_data()
+            t0 = time.monotonic()
             if reading is None or isinstance(reading, bool) or reading.spectrum is None:
                 log.error("failed to get spectrum")
-                return False
+                return False, None
             spectrum = reading.spectrum
 
-            state = self.device.settings.state
+            state = settings.state
 
-            peak = spectrum[self.pixel] if self.pixel is not None else max(spectrum)
-            delta = self.intensity - peak
+            # float() so unsigned numpy peaks (e.g. uint16) can't wrap in delta
+            peak = float(get_peak(spectrum))
+            delta = intensity - peak
 
-            log.debug("integration_time_ms %d, laser_power %d, peak %d, delta %d", 
-                state.integration_time_ms, state.laser_power, peak, delta)
+            if debug:
+                log.debug("integration_time_ms %d, laser_power_perc %d, peak %d, delta %d", 
+                    state.integration_time_ms, state.laser_power_perc, int(peak), int(delta))
 
             # exit case
-            if abs(delta) <= self.threshold:
+            if abs(delta) <= threshold:
                 log.debug("balanced")
-                return True
+                return True, peak
 
             # adjust
-            last_value = state.integration_time_ms if self.using_integ() else state.laser_power
-            if not adjust_func(peak):
-                return False
-            new_value = state.integration_time_ms if self.using_integ() else state.laser_power
-
-            # check if we're up against a limit
-            if last_value == new_value:
+            last_value = getattr(state, value_name)
+            ratio = intensity / max(peak, 1)
+            n, overshot = adjust(last_value, delta, ratio, prev_delta, lo, hi, peak >= self.SATURATION)
+            if debug:
+                log.debug("new %s = %d", value_name, n)
+            prev_delta = delta
+            if overshot:
+                overshoot_count += 1
+                self.overshoot_count = overshoot_count
+                if overshoot_count > self.MAX_OVERSHOOTS:
+                    log.error("too many overshoots")
+                    return False, peak
+
+            # skip the USB write if nothing changed (e.g. clamped at a limit),
+            # but count it so a saturated pass still terminates
+            if n == last_value:
                 same_count += 1
                 if same_count >= 3:
                     log.error("adjusted to same value (%s) %d times...giving up", last_value, same_count)
-                    return False
+                    return False, peak
             else:
                 same_count = 0
+                setter(n)
 
             try_count += 1
 
             if try_count >= self.max_tries:
                 log.error("giving up after %d tries", try_count)
-                return False
-
-    def adjust_integration(self, peak):
-        state = self.device.settings.state
-        if peak > self.intensity:
-            n = int(state.integration_time_ms / 2)
-            self.overshoot_count += 1
-            if self.overshoot_count > 5:
-                log.error("too many overshoots")
-                return False
-        else:
-            n = int(1.0 * state.integration_time_ms * self.intensity / peak)
-
-        n = max(self.device.settings.eeprom.min_integration_time_ms, min(self.max_integration_time_ms, n))
-
-        log.debug("new integ = %d", n)
-        self.device.hardware.set_integration_time_ms(n)
-        return True
-
-    def adjust_laser(self, peak):
-        state = self.device.settings.state
-        if peak > self.intensity:
-            n = int(state.laser_power / 2)
-            self.overshoot_count += 1
-            if self.overshoot_count > 5:
-                log.error("too many overshoots")
-                return False
+                return False, peak
+
+            # rather than hammering the USB stack back-to-back, leave a gap
+            # after each acquisition of the integration time just measured (not
+            # the one setter() may have applied), up to max_backoff_ms
+            slack = min(measured_integration_sec, max_backoff_sec) - (time.monotonic() - t0)
+            if slack > 0:
+                time.sleep(slack)
+
+    ##
+    # Halves the current value on a true overshoot (peak saturated, or more
+    # than twice the target); otherwise takes a proportional step toward the
+    # target, damped by a derivative term so that large swings in delta (e.g.
+    # crossing the target) take smaller steps and converge in fewer acquisitions.
+    #
+    # @returns tuple of (new value clamped to [lo, hi], whether the peak overshot)
+    def adjust(self, current, delta, ratio, prev_delta, lo, hi, saturated=False):
+        overshot = saturated or ratio < 0.5
+        if overshot:
+            n = int(current) // 2
         else:
-            n = int(1.0 * state.laser_power * self.intensity / peak)
-
-        n = max(1, min(100, n))
-
-        log.debug("new power = %d", n)
-        self.device.hardware.set_laser_power_perc(n)
-        return True
+            if prev_delta is None:
+                damping = 1.0
+            else:
+                deriv = (delta - prev_delta) / max(1, abs(prev_delta))
+                damping = 1.0 / (1.0 + self.DERIVATIVE_GAIN * abs(deriv))
+            n = int(current * (1.0 + (ratio - 1.0) * damping))
+        return _clamp(n, lo, hi), overshot
 
     def parse_mode(self, s):
-        s = s.strip().lower()
-        if re.match("integ", s):
-            return self.INTEGRATION
-        elif re.match("laser.*integ", s):
-            return self.LASER_THEN_INTEGRATION
-        elif re.match("laser", s):
-            return self.LASER
-        else:
-            raise Exception("invalid BalanceAcquisition mode: " + s)
-
+        return _parse_mode(s)
+
+@functools.lru_cache(maxsize=32)
+def _parse_mode(s):
+    s = s.strip().lower()
+    if s.startswith("integ"):
+        return BalanceAcquisition.INTEGRATION
+    elif s.startswith("laser"):
+        if "integ" in s[5:]:
+            return BalanceAcquisition.LASER_THEN_INTEGRATION
+        return BalanceAcquisition.LASER
+    else:
+        raise Exception("invalid BalanceAcquisition mode: " + s)
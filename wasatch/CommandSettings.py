@@ -47,6 +47,18 @@ SETTINGS = {
     "reset_fpga":                      { "datatype": "void" },
 }
 
+## SETTINGS names in sorted order (SETTINGS is constant, so sort it once)
+_SORTED_SETTINGS = tuple(sorted(SETTINGS.keys()))
+
+## converters from string values (e.g. typed into wasatch-shell) to each datatype
+_CONVERTERS = {
+    "bool":    lambda value: "true" in value.lower(),
+    "int":     int,
+    "float":   float,
+    "string":  str,
+    "float[]": lambda value: [ float(tok) for tok in value.split(',') ],
+}
+
 ##
 # This class encapsulates information about the "ControlObject" settings
 # supported by WasatchDevice hardware classes (FID and SP).  These are
@@ -60,7 +72,7 @@ SETTINGS = {
 class CommandSettings(object):
 
     def get_settings(self):
-        return sorted(SETTINGS.keys())
+        return _SORTED_SETTINGS
 
     def get_datatype(self, setting):
         if not setting in SETTINGS:
@@ -77,19 +89,8 @@ class CommandSettings(object):
             return None
 
         dt = SETTINGS[setting]["datatype"]
-        if dt == "bool":
-            return "true" in value.lower()
-        elif dt == "int":
-            return int(value)
-        elif dt == "float":
-            return float(value)
-        elif dt == "string":
-            return str(value)
-        elif dt == "float[]":
-            values = []
-            for tok in value.split(','):
-                values.append(float(tok))
-            return values
-        else:
+        converter = _CONVERTERS.get(dt)
+        if converter is None:
             log.debug("don't know how to convert %s %s settings", setting, dt)
             return value
+        return converter(value)
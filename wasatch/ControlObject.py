@@ -6,6 +6,11 @@
 # is an (unused) step in that direction.  For now, the true master list
 # would be the set implemented by FeatureIdentificationDevice.write_setting.
 class ControlObject(object):
+
+    # one of these is allocated per queued command (e.g. every tick of a
+    # dragged slider), so skip the per-instance __dict__
+    __slots__ = ("setting", "value")
+
     def __init__(self, setting, value):
         self.setting = setting
         self.value = value
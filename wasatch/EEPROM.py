@@ -1,11 +1,10 @@
 import hashlib
 import logging
 import struct
-import array
 import math
-import copy
 import json
-import re
+
+import numpy as np
 
 from . import utils
 
@@ -13,6 +12,144 @@ from .ROI import ROI
 
 log = logging.getLogger(__name__)
 
+# pre-compiled little-endian Structs for each scalar EEPROM datatype, so
+# unpack() / pack() don't re-parse a format string per field
+_STRUCTS = { c: struct.Struct("<" + c) for c in "BbHhIif?" }
+
+##
+# Reads a NUL-terminated string field.  This stops at the first NULL, so is not
+# appropriate for binary data (user_data).  OTOH, it doesn't currently enforce
+# "printable" characters either (nor support Unicode; bytes map 1:1 to chars).
+def _read_string(buf, start, length):
+    return bytes(buf[start:start + length]).split(b'\x00', 1)[0].decode('latin-1')
+
+def _make_reader(st):
+    unpack_from = st.unpack_from
+    return lambda buf, start, length: unpack_from(buf, start)[0]
+
+## unpack() dispatch: datatype -> reader(buf, start, length)
+_READERS = { c: _make_reader(st) for c, st in _STRUCTS.items() }
+_READERS["s"] = _read_string
+
+##
+# Scalar EEPROM fields which map directly onto an attribute, as
+# (attribute, page, offset, length, datatype, min_format).  Fields are only read
+# if the EEPROM format is at least min_format, but are always written.  Fields
+# whose layout varies by format (feature mask, legacy integration limits etc)
+# are handled explicitly in read_eeprom() and generate_write_buffers().
+#
+# @see ENG-0034
+_FIELDS = (
+    # Page 0
+    ("model",                        0,  0, 16, "s",  0),
+    ("serial_number",                0, 16, 16, "s",  0),
+    ("baud_rate",                    0, 32,  4, "I",  0),
+    ("has_cooling",                  0, 36,  1, "?",  0),
+    ("has_battery",                  0, 37,  1, "?",  0),
+    ("has_laser",                    0, 38,  1, "?",  0),
+    ("slit_size_um",                 0, 41,  2, "H",  0),
+    # NOTE: the new InGaAs detector gain/offset won't be usable from 
+    #       EEPROM until we start bumping production spectrometers to
+    #       EEPROM Page 0 Revision 3!
+    ("startup_integration_time_ms",  0, 43,  2, "H",  3),
+    ("startup_temp_degC",            0, 45,  2, "h",  3),
+    ("startup_triggering_scheme",    0, 47,  1, "B",  3),
+    ("detector_gain",                0, 48,  4, "f",  3), # "even pixels" for InGaAs
+    ("detector_offset",              0, 52,  2, "h",  3), # "even pixels" for InGaAs
+    ("detector_gain_odd",            0, 54,  4, "f",  3), # InGaAs-only
+    ("detector_offset_odd",          0, 58,  2, "h",  3), # InGaAs-only
+
+    # Page 1
+    ("max_temp_degC",                1, 28,  2, "h",  0),
+    ("min_temp_degC",                1, 30,  2, "h",  0),
+    ("tec_r298",                     1, 44,  2, "h",  0),
+    ("tec_beta",                     1, 46,  2, "h",  0),
+    ("calibration_date",             1, 48, 12, "s",  0),
+    ("calibrated_by",                1, 60,  3, "s",  0),
+
+    # Page 2
+    ("detector",                     2,  0, 16, "s",  0),
+    ("active_pixels_horizontal",     2, 16,  2, "H",  0),
+    ("laser_warmup_sec",             2, 18,  1, "B", 10),
+    ("active_pixels_vertical",       2, 19,  2, "H",  0),
+    ("actual_horizontal",            2, 25,  2, "H",  0),
+    ("roi_horizontal_start",         2, 27,  2, "H",  0),
+    ("roi_horizontal_end",           2, 29,  2, "H",  0),
+    ("roi_vertical_region_1_start",  2, 31,  2, "H",  0),
+    ("roi_vertical_region_1_end",    2, 33,  2, "H",  0),
+    ("roi_vertical_region_2_start",  2, 35,  2, "H",  0),
+    ("roi_vertical_region_2_end",    2, 37,  2, "H",  0),
+    ("roi_vertical_region_3_start",  2, 39,  2, "H",  0),
+    ("roi_vertical_region_3_end",    2, 41,  2, "H",  0),
+
+    # Page 3
+    ("max_laser_power_mW",           3, 28,  4, "f",  0),
+    ("min_laser_power_mW",           3, 32,  4, "f",  0),
+    ("excitation_nm_float",          3, 36,  4, "f",  4),
+    ("min_integration_time_ms",      3, 40,  4, "I",  5),
+    ("max_integration_time_ms",      3, 44,  4, "I",  5),
+    ("avg_resolution",               3, 48,  4, "f",  7),
+
+    # Page 5
+    ("product_configuration",        5, 30, 16, "s",  5),
+    ("subformat",                    5, 63,  1, "B",  7),
+)
+
+## unsigned fields which were stored signed prior to format 4
+_LEGACY_SIGNED = frozenset([
+    "slit_size_um",
+    "active_pixels_vertical",
+    "actual_horizontal",
+    "roi_horizontal_start",
+    "roi_horizontal_end",
+    "roi_vertical_region_1_start",
+    "roi_vertical_region_1_end",
+    "roi_vertical_region_2_start",
+    "roi_vertical_region_2_end",
+    "roi_vertical_region_3_start",
+    "roi_vertical_region_3_end" ])
+
+## float32 coefficient arrays, as (attribute, page, offset, count)
+_COEFFS = (
+    ("wavelength_coeffs",            1,  0,  4),
+    ("degC_to_dac_coeffs",           1, 16,  3),
+    ("adc_to_degC_coeffs",           1, 32,  3),
+    ("linearity_coeffs",             2, 43,  5), # overloading for secondary ADC
+    ("laser_power_coeffs",           3, 12,  4),
+)
+
+## maps non-printable bytes to '.', leaving printable ASCII and NUL intact
+_PRINTABLE_TABLE = bytes(c if 31 < c < 127 or c == 0 else ord('.') for c in range(256))
+
+## replace NaN floats (including within lists) with None, for strict JSON
+def _nan_to_none(v):
+    if isinstance(v, float) and math.isnan(v):
+        return None
+    if isinstance(v, list):
+        return [ _nan_to_none(x) for x in v ]
+    return v
+
+_NUMPY_TYPES = { "B": "u1", "b": "i1", "H": "<u2", "h": "<i2", "I": "<u4", "i": "<i4", "f": "<f4", "?": "?" }
+
+##
+# Build a numpy structured dtype overlaying every numeric _FIELDS / _COEFFS
+# entry on the given page, so the whole page decodes in a single frombuffer().
+def _page_dtype(page):
+    names, formats, offsets = [], [], []
+    for name, pg, offset, length, data_type, _ in _FIELDS:
+        if pg == page and data_type != "s":
+            names.append(name)
+            formats.append(_NUMPY_TYPES[data_type])
+            offsets.append(offset)
+    for name, pg, offset, count in _COEFFS:
+        if pg == page:
+            names.append(name)
+            formats.append(("<f4", (count,)))
+            offsets.append(offset)
+    return np.dtype({ "names": names, "formats": formats, "offsets": offsets, "itemsize": 64 })
+
+_PAGE_DTYPES = { page: _page_dtype(page) for page in sorted(set(f[1] for f in _FIELDS + _COEFFS)) }
+
 ##
 # This class encapsulates the post-read parsing, pre-write marshalling, and current
 # state of the 8-page EEPROM used to store non-volatile configuration data in Wasatch
@@ -32,6 +169,38 @@ class EEPROM(object):
     SUBPAGE_COUNT = 4
     MAX_RAMAN_INTENSITY_CALIBRATION_ORDER = 7
 
+    ## fields normally editable by users via ENLIGHTEN
+    editable = ( "excitation_nm",
+                 "excitation_nm_float",
+                 "detector_gain",
+                 "detector_offset",
+                 "detector_gain_odd",
+                 "detector_offset_odd",
+                 "calibrated_by",
+                 "calibration_date",
+                 "user_text",
+                 "wavelength_coeffs",
+                 "linearity_coeffs",
+                 "max_laser_power_mW",
+                 "min_laser_power_mW",
+                 "laser_power_coeffs",
+                 "bad_pixels",
+                 "bin_2x2",
+                 "gen15",
+                 "cutoff_filter_installed",
+                 "laser_warmup_sec",
+                 "roi_horizontal_end",
+                 "roi_horizontal_start",
+                 "roi_vertical_region_1_end",
+                 "roi_vertical_region_1_start",
+                 "roi_vertical_region_2_end",
+                 "roi_vertical_region_2_start",
+                 "roi_vertical_region_3_end",
+                 "roi_vertical_region_3_start",
+                 "raman_intensity_calibration_order",
+                 "raman_intensity_coeffs" )
+    _EDITABLE_LC = frozenset(field.lower() for field in editable)
+
     def __init__(self):
         self.format = 0
 
@@ -105,37 +274,9 @@ class EEPROM(object):
 
         self.buffers = []
         self.write_buffers = []
+        self._debug = False # log.isEnabledFor(DEBUG), checked once per parse()
         self.digest = None
 
-        self.editable = [ "excitation_nm",
-                          "excitation_nm_float",
-                          "detector_gain",
-                          "detector_offset",
-                          "detector_gain_odd",
-                          "detector_offset_odd",
-                          "calibrated_by",
-                          "calibration_date", 
-                          "user_text",
-                          "wavelength_coeffs",
-                          "linearity_coeffs",
-                          "max_laser_power_mW",
-                          "min_laser_power_mW",
-                          "laser_power_coeffs",
-                          "bad_pixels",
-                          "bin_2x2",
-                          "gen15",
-                          "cutoff_filter_installed",
-                          "laser_warmup_sec",
-                          "roi_horizontal_end",             
-                          "roi_horizontal_start",           
-                          "roi_vertical_region_1_end",      
-                          "roi_vertical_region_1_start",    
-                          "roi_vertical_region_2_end",      
-                          "roi_vertical_region_2_start",    
-                          "roi_vertical_region_3_end",      
-                          "roi_vertical_region_3_start",
-                          "raman_intensity_calibration_order",
-                          "raman_intensity_coeffs" ]
 
         self.init_raman_intensity_calibration()
         self.init_spline()
@@ -147,24 +288,25 @@ class EEPROM(object):
     # @return False otherwise (don't trust in None's truthiness, as you can't 
     #         pass None to Qt's setEnabled)
     def is_editable(self, name):
-        s = name.lower()
-        for field in self.editable:
-            if s == field.lower():
-                return True
-        return False
+        return name.lower() in EEPROM._EDITABLE_LC
 
     ## 
     # passed a temporary copy of another EEPROM object, copy-over any
     # "editable" fields to this one
     def update_editable(self, new_eeprom):
-        for field in self.editable:
+        debug = log.isEnabledFor(logging.DEBUG)
+        for field in EEPROM.editable:
             old = getattr(self, field)
-            new = copy.deepcopy(getattr(new_eeprom, field))
+            new = getattr(new_eeprom, field)
+            if isinstance(new, list):
+                new = list(new) # editable lists are flat lists of numbers
             if old == new:
-                log.debug("  %s: no change (%s == %s)", field, old, new)
+                if debug:
+                    log.debug("  %s: no change (%s == %s)", field, old, new)
             else:
                 setattr(self, field, new)
-                log.debug("  %s: changed %s --> %s", field, old, new)
+                if debug:
+                    log.debug("  %s: changed %s --> %s", field, old, new)
 
     # ##########################################################################
     #                                                                          #
@@ -184,6 +326,9 @@ class EEPROM(object):
         self.buffers = buffers
         self.digest = self.generate_digest()
 
+        # unpack() logs every field at DEBUG, so check the level once up-front
+        self._debug = log.isEnabledFor(logging.DEBUG)
+
         # unpack all the fields we know about
         try:
             self.read_eeprom()
@@ -203,16 +348,33 @@ class EEPROM(object):
         self.format = self.unpack((0, 63,  1), "B", "format")
         log.debug("parsing EEPROM format %d", self.format)
 
+        # ######################################################################
+        # Simple fields
+        # ######################################################################
+
+        records = self.decode_pages()
+
+        for name, page, offset, length, data_type, min_format in _FIELDS:
+            if self.format >= min_format:
+                values = records.get(page)
+                if self.format < 4 and name in _LEGACY_SIGNED:
+                    setattr(self, name, self.unpack((page, offset, length), "h", name))
+                elif data_type == "s" or values is None:
+                    setattr(self, name, self.unpack((page, offset, length), data_type, name))
+                else:
+                    setattr(self, name, values[name])
+
+        for name, page, offset, count in _COEFFS:
+            values = records.get(page)
+            if values is None:
+                setattr(self, name, [ self.unpack((page, offset + i * 4, 4), "f", "%s[%d]" % (name, i)) for i in range(count) ])
+            else:
+                setattr(self, name, values[name])
+
         # ######################################################################
         # Page 0
         # ######################################################################
 
-        self.model                           = self.unpack((0,  0, 16), "s", "model")
-        self.serial_number                   = self.unpack((0, 16, 16), "s", "serial")
-        self.baud_rate                       = self.unpack((0, 32,  4), "I", "baud")
-        self.has_cooling                     = self.unpack((0, 36,  1), "?", "cooling")
-        self.has_battery                     = self.unpack((0, 37,  1), "?", "battery")
-        self.has_laser                       = self.unpack((0, 38,  1), "?", "laser")
         if self.format > 9:
             self.feature_mask                = self.unpack((0, 39,  2), "H", "feature_mask")
         elif self.format >= 3:
@@ -220,57 +382,10 @@ class EEPROM(object):
         else:
             self.excitation_nm               = self.unpack((0, 39,  2), "h", "excitation_nm (signed)")
 
-        if self.format >= 4:
-            self.slit_size_um                = self.unpack((0, 41,  2), "H", "slit (unsigned)")
-        else:
-            self.slit_size_um                = self.unpack((0, 41,  2), "h", "slit (signed)")
-
-        # NOTE: the new InGaAs detector gain/offset won't be usable from 
-        #       EEPROM until we start bumping production spectrometers to
-        #       EEPROM Page 0 Revision 3!
-        if self.format >= 3:
-            self.startup_integration_time_ms = self.unpack((0, 43,  2), "H", "start_integ")
-            self.startup_temp_degC           = self.unpack((0, 45,  2), "h", "start_temp")
-            self.startup_triggering_scheme   = self.unpack((0, 47,  1), "B", "start_trigger")
-            self.detector_gain               = self.unpack((0, 48,  4), "f", "gain") # "even pixels" for InGaAs
-            self.detector_offset             = self.unpack((0, 52,  2), "h", "offset") # "even pixels" for InGaAs
-            self.detector_gain_odd           = self.unpack((0, 54,  4), "f", "gain_odd") # InGaAs-only
-            self.detector_offset_odd         = self.unpack((0, 58,  2), "h", "offset_odd") # InGaAs-only
-
-        # ######################################################################
-        # Page 1
-        # ######################################################################
-
-        self.wavelength_coeffs = []
-        self.wavelength_coeffs         .append(self.unpack((1,  0,  4), "f", "wavecal_coeff_0"))
-        self.wavelength_coeffs         .append(self.unpack((1,  4,  4), "f"))
-        self.wavelength_coeffs         .append(self.unpack((1,  8,  4), "f"))
-        self.wavelength_coeffs         .append(self.unpack((1, 12,  4), "f"))
-        self.degC_to_dac_coeffs = []
-        self.degC_to_dac_coeffs        .append(self.unpack((1, 16,  4), "f", "degCtoDAC_coeff_0"))
-        self.degC_to_dac_coeffs        .append(self.unpack((1, 20,  4), "f"))
-        self.degC_to_dac_coeffs        .append(self.unpack((1, 24,  4), "f"))
-        self.max_temp_degC                   = self.unpack((1, 28,  2), "h", "max_temp")
-        self.min_temp_degC                   = self.unpack((1, 30,  2), "h", "min_temp")
-        self.adc_to_degC_coeffs = []
-        self.adc_to_degC_coeffs        .append(self.unpack((1, 32,  4), "f", "adcToDegC_coeff_0"))
-        self.adc_to_degC_coeffs        .append(self.unpack((1, 36,  4), "f"))
-        self.adc_to_degC_coeffs        .append(self.unpack((1, 40,  4), "f"))
-        self.tec_r298                        = self.unpack((1, 44,  2), "h", "r298")
-        self.tec_beta                        = self.unpack((1, 46,  2), "h", "beta")
-        self.calibration_date                = self.unpack((1, 48, 12), "s", "date")
-        self.calibrated_by                   = self.unpack((1, 60,  3), "s", "tech")
-                                    
         # ######################################################################
         # Page 2                    
         # ######################################################################
 
-        self.detector                        = self.unpack((2,  0, 16), "s", "detector")
-        self.active_pixels_horizontal        = self.unpack((2, 16,  2), "H", "pixels")
-        if self.format >= 10:
-            self.laser_warmup_sec            = self.unpack((2, 18,  1), "B", "laser_warmup_sec")
-        self.active_pixels_vertical          = self.unpack((2, 19,  2), "H" if self.format >= 4 else "h")
-
         if self.format >= 8:
             self.wavelength_coeffs     .append(self.unpack((2, 21,  4), "f", "wavecal_coeff_4"))
         else:
@@ -280,47 +395,15 @@ class EEPROM(object):
                 self.min_integration_time_ms     = self.unpack((2, 21,  2), "H", "min_integ(ushort)")
                 self.max_integration_time_ms     = self.unpack((2, 23,  2), "H", "max_integ(ushort)") 
 
-        self.actual_horizontal               = self.unpack((2, 25,  2), "H" if self.format >= 4 else "h", "actual_horiz")
         self.actual_vertical                 = self.active_pixels_vertical  # approximate for now
-        self.roi_horizontal_start            = self.unpack((2, 27,  2), "H" if self.format >= 4 else "h")
-        self.roi_horizontal_end              = self.unpack((2, 29,  2), "H" if self.format >= 4 else "h")
-        self.roi_vertical_region_1_start     = self.unpack((2, 31,  2), "H" if self.format >= 4 else "h")
-        self.roi_vertical_region_1_end       = self.unpack((2, 33,  2), "H" if self.format >= 4 else "h")
-        self.roi_vertical_region_2_start     = self.unpack((2, 35,  2), "H" if self.format >= 4 else "h")
-        self.roi_vertical_region_2_end       = self.unpack((2, 37,  2), "H" if self.format >= 4 else "h")
-        self.roi_vertical_region_3_start     = self.unpack((2, 39,  2), "H" if self.format >= 4 else "h")
-        self.roi_vertical_region_3_end       = self.unpack((2, 41,  2), "H" if self.format >= 4 else "h")
-        self.linearity_coeffs = []
-        self.linearity_coeffs          .append(self.unpack((2, 43,  4), "f", "linearity_coeff_0")) # overloading for secondary ADC
-        self.linearity_coeffs          .append(self.unpack((2, 47,  4), "f"))
-        self.linearity_coeffs          .append(self.unpack((2, 51,  4), "f"))
-        self.linearity_coeffs          .append(self.unpack((2, 55,  4), "f"))
-        self.linearity_coeffs          .append(self.unpack((2, 59,  4), "f"))
 
         # ######################################################################
         # Page 3
         # ######################################################################
         
-        self.laser_power_coeffs = []
-        self.laser_power_coeffs        .append(self.unpack((3, 12,  4), "f", "laser_power_coeff_0"))
-        self.laser_power_coeffs        .append(self.unpack((3, 16,  4), "f"))
-        self.laser_power_coeffs        .append(self.unpack((3, 20,  4), "f"))
-        self.laser_power_coeffs        .append(self.unpack((3, 24,  4), "f"))
-        self.max_laser_power_mW              = self.unpack((3, 28,  4), "f", "max_laser_mW")
-        self.min_laser_power_mW              = self.unpack((3, 32,  4), "f", "min_laser_mW")
-
-        if self.format >= 4:
-            self.excitation_nm_float         = self.unpack((3, 36,  4), "f", "excitation(float)")
-        else:
+        if self.format < 4:
             self.excitation_nm_float = self.excitation_nm
 
-        if self.format >= 5:
-            self.min_integration_time_ms     = self.unpack((3, 40,  4), "I", "min_integ(uint)")
-            self.max_integration_time_ms     = self.unpack((3, 44,  4), "I", "max_integ(uint)") 
-
-        if self.format >= 7:
-            self.avg_resolution              = self.unpack((3, 48, 4), "f", "avg_resolution")
-
         # ######################################################################
         # Page 4
         # ######################################################################
@@ -332,18 +415,18 @@ class EEPROM(object):
         # Page 5
         # ######################################################################
 
-        bad = set()
-        for count in range(15):
-            pixel = self.unpack((5, count * 2, 2), "h")
-            if pixel != -1:
-                bad.add(pixel)
-        self.bad_pixels = list(bad)
-        self.bad_pixels.sort()
-
-        if self.format >= 5:
-            self.product_configuration       = self.unpack((5,  30, 16), "s", "product_config")
-        if self.format >= 7:
-            self.subformat                   = self.unpack((5,  63,  1), "B", "subformat")
+        # 15 int16 pixel indices, unused slots set to -1
+        try:
+            pixels = np.frombuffer(self.buffers[5], dtype="<i2", count=15)
+            self.bad_pixels = np.unique(pixels[pixels != -1]).tolist()
+        except:
+            log.debug("unable to decode bad pixels as an array, unpacking by field")
+            bad = set()
+            for count in range(15):
+                pixel = self.unpack((5, count * 2, 2), "h")
+                if pixel is not None and pixel != -1:
+                    bad.add(pixel)
+            self.bad_pixels = sorted(bad)
 
         # ######################################################################
         # Page 6-7
@@ -408,6 +491,27 @@ class EEPROM(object):
             (self.min_laser_power_mW, self.max_laser_power_mW) = \
             (self.max_laser_power_mW, self.min_laser_power_mW)
 
+    ##
+    # Decode the numeric fields of each tabulated page with one structured-dtype
+    # read per page.  Pages which can't be overlaid (short or non-buffer data)
+    # are omitted, and read_eeprom() falls back to unpack() for their fields.
+    #
+    # Each record is converted to native Python values with a single item() call,
+    # so no per-field numpy scalars are created.
+    #
+    # @returns dict of page -> dict of attribute -> value
+    def decode_pages(self):
+        records = {}
+        for page, dtype in _PAGE_DTYPES.items():
+            try:
+                rec = np.frombuffer(self.buffers[page], dtype=dtype, count=1)[0]
+            except:
+                log.debug("unable to decode EEPROM page %d as a record, unpacking by field", page)
+                continue
+            records[page] = { name: value.tolist() if isinstance(value, np.ndarray) else value
+                              for name, value in zip(dtype.names, rec.item()) }
+        return records
+
     ############################################################################
     #                                                                          #
     #                               Write EEPROM                               #
@@ -429,10 +533,8 @@ class EEPROM(object):
     # Call this to populate an internal array of "write buffers" which may be written back
     # to spectrometers (or used to generate the digest of what WOULD be written).
     def generate_write_buffers(self):
-        # stub-out 8 blank buffers
-        self.write_buffers = []
-        for page in range(EEPROM.MAX_PAGES):
-            self.write_buffers.append(array.array('B', [0] * 64))
+        # stub-out 8 blank (zeroed) buffers
+        self.write_buffers = [ bytearray(64) for page in range(EEPROM.MAX_PAGES) ]
 
         # Eventually we'll stop worrying about the legacy per-page format versions, but
         # for now maximize compatibility with StrokerConsole/ModelConfigurationFormat.cs
@@ -452,56 +554,28 @@ class EEPROM(object):
         self.write_buffers[0][63] = EEPROM.LATEST_REV
 
         # ######################################################################
-        # Page 0
+        # Simple fields
         # ######################################################################
 
-        self.pack((0,  0, 16), "s", self.model)
-        self.pack((0, 16, 16), "s", self.serial_number)
-        self.pack((0, 32,  4), "I", self.baud_rate)
-        self.pack((0, 36,  1), "?", self.has_cooling)
-        self.pack((0, 37,  1), "?", self.has_battery)
-        self.pack((0, 38,  1), "?", self.has_laser)
-        self.pack((0, 39,  2), "H", self.generate_feature_mask(), "FeatureMask")
-        self.pack((0, 41,  2), "H", self.slit_size_um)
-        self.pack((0, 43,  2), "H", self.startup_integration_time_ms)
-        self.pack((0, 45,  2), "h", self.startup_temp_degC)
-        self.pack((0, 47,  1), "B", self.startup_triggering_scheme)
-        self.pack((0, 48,  4), "f", self.detector_gain)
-        self.pack((0, 52,  2), "h", self.detector_offset)
-        self.pack((0, 54,  4), "f", self.detector_gain_odd)
-        self.pack((0, 58,  2), "h", self.detector_offset_odd)
+        for name, page, offset, length, data_type, _ in _FIELDS:
+            self.pack((page, offset, length), data_type, getattr(self, name))
+
+        for name, page, offset, count in _COEFFS:
+            coeffs = getattr(self, name)
+            if coeffs is not None:
+                for i in range(min(count, len(coeffs))):
+                    self.pack((page, offset + i * 4, 4), "f", coeffs[i])
 
         # ######################################################################
-        # Page 1
+        # Page 0
         # ######################################################################
 
-        if self.wavelength_coeffs is not None:
-            for i in range(min(4, len(self.wavelength_coeffs))):
-                self.pack((1,  0 + i * 4,  4), "f", self.wavelength_coeffs[i])
-                
-        if self.degC_to_dac_coeffs is not None:
-            for i in range(min(3, len(self.degC_to_dac_coeffs))):
-                self.pack((1, 16 + i * 4,  4), "f", self.degC_to_dac_coeffs[i])
-
-        if self.adc_to_degC_coeffs is not None:
-            for i in range(min(3, len(self.adc_to_degC_coeffs))):
-                self.pack((1, 32 + i * 4,  4), "f", self.adc_to_degC_coeffs[i])
-
-        self.pack((1, 28,  2), "h", self.max_temp_degC)
-        self.pack((1, 30,  2), "h", self.min_temp_degC)
-        self.pack((1, 44,  2), "h", self.tec_r298)
-        self.pack((1, 46,  2), "h", self.tec_beta)
-        self.pack((1, 48, 12), "s", self.calibration_date)
-        self.pack((1, 60,  3), "s", self.calibrated_by)
-                                    
+        self.pack((0, 39,  2), "H", self.generate_feature_mask(), "FeatureMask")
+
         # ######################################################################
         # Page 2                    
         # ######################################################################
 
-        self.pack((2,  0, 16), "s", self.detector)
-        self.pack((2, 16,  2), "H", self.active_pixels_horizontal)
-        self.pack((2, 18,  1), "B", self.laser_warmup_sec)
-        self.pack((2, 19,  2), "H", self.active_pixels_vertical)
         if self.format < 7:
             self.pack((2, 21,  2), "H", max(0xffff, self.min_integration_time_ms))
             self.pack((2, 23,  2), "H", max(0xffff, self.max_integration_time_ms))
@@ -510,34 +584,6 @@ class EEPROM(object):
             if len(self.wavelength_coeffs) > 4:
                 coeff = self.wavelength_coeffs[4]
             self.pack((2, 21,  4), "f", coeff)
-        self.pack((2, 25,  2), "H", self.actual_horizontal)
-        self.pack((2, 27,  2), "H", self.roi_horizontal_start)
-        self.pack((2, 29,  2), "H", self.roi_horizontal_end)
-        self.pack((2, 31,  2), "H", self.roi_vertical_region_1_start)
-        self.pack((2, 33,  2), "H", self.roi_vertical_region_1_end)
-        self.pack((2, 35,  2), "H", self.roi_vertical_region_2_start)
-        self.pack((2, 37,  2), "H", self.roi_vertical_region_2_end)
-        self.pack((2, 39,  2), "H", self.roi_vertical_region_3_start)
-        self.pack((2, 41,  2), "H", self.roi_vertical_region_3_end)
-
-        if self.linearity_coeffs is not None:
-            for i in range(min(5, len(self.linearity_coeffs))):
-                self.pack((2, 43 + i * 4,  4), "f", self.linearity_coeffs[i])
-
-        # ######################################################################
-        # Page 3
-        # ######################################################################
-
-        if self.laser_power_coeffs is not None:
-            for i in range(min(4, len(self.laser_power_coeffs))):
-                self.pack((3, 12 + i * 4,  4), "f", self.laser_power_coeffs[i])
-
-        self.pack((3, 28,  4), "f", self.max_laser_power_mW)
-        self.pack((3, 32,  4), "f", self.min_laser_power_mW)
-        self.pack((3, 36,  4), "f", self.excitation_nm_float)
-        self.pack((3, 40,  4), "I", self.min_integration_time_ms)
-        self.pack((3, 44,  4), "I", self.max_integration_time_ms)
-        self.pack((3, 48,  4), "f", self.avg_resolution)
 
         # ######################################################################
         # Page 4
@@ -549,21 +595,10 @@ class EEPROM(object):
         # Page 5
         # ######################################################################
 
-        bad_pixel_set = set()
-        for i in self.bad_pixels:
-            if i >= 0:
-                bad_pixel_set.add(i)
-        bad_pixels = list(bad_pixel_set)
-        bad_pixels.sort()
-        for i in range(15):
-            if i < len(bad_pixels):
-                value = bad_pixels[i]
-            else:
-                value = -1
-            self.pack((5, i * 2, 2), "h", value)
-
-        self.pack((5, 30, 16), "s", self.product_configuration)
-        self.pack((5, 63,  1), "B", self.subformat)
+        bad_pixels = sorted(set(i for i in self.bad_pixels if i >= 0))[:15]
+        pixels = np.full(15, -1, dtype="<i2")
+        pixels[:len(bad_pixels)] = bad_pixels
+        self.write_buffers[5][0:30] = pixels.tobytes()
 
         # ######################################################################
         # Page 6-7
@@ -590,15 +625,11 @@ class EEPROM(object):
 
     ## make a printable ASCII string out of possibly-binary data
     def printable(self, buf):
-        s = ""
-        for c in buf:
-            if 31 < c < 127:
-                s += chr(c)
-            elif c == 0:
-                break
-            else:
-                s += '.'
-        return s
+        data = bytes(buf).translate(_PRINTABLE_TABLE)
+        nul = data.find(b'\x00')
+        if nul >= 0:
+            data = data[:nul]
+        return data.decode('ascii')
 
     def set(self, name, value):
         setattr(self, name, value)
@@ -652,25 +683,17 @@ class EEPROM(object):
                 page, start_byte, length, data_type, buf, label, exc_info=1)
             return
 
-        if data_type == "s":
-            # This stops at the first NULL, so is not appropriate for binary data (user_data).
-            # OTOH, it doesn't currently enforce "printable" characters either (nor support Unicode).
-            unpack_result = ""
-            for c in buf[start_byte:end_byte]:
-                if c == 0:
-                    break
-                unpack_result += chr(c)
-        else:
-            unpack_result = 0
-            try:
-                unpack_result = struct.unpack(data_type, buf[start_byte:end_byte])[0]
-            except:
-                log.error("error unpacking EEPROM page %d, offset %d, len %d as %s", page, start_byte, length, data_type, exc_info=1)
+        try:
+            unpack_result = _READERS[data_type](buf, start_byte, length)
+        except:
+            log.error("error unpacking EEPROM page %d, offset %d, len %d as %s", page, start_byte, length, data_type, exc_info=1)
+            unpack_result = "" if data_type == "s" else 0
 
-        if label is None:
-            log.debug("Unpacked [%s]: %s", data_type, unpack_result)
-        else:
-            log.debug("Unpacked [%s]: %s (%s)", data_type, unpack_result, label)
+        if self._debug:
+            if label is None:
+                log.debug("Unpacked [%s]: %s", data_type, unpack_result)
+            else:
+                log.debug("Unpacked [%s]: %s (%s)", data_type, unpack_result, label)
         return unpack_result
 
     ## 
@@ -703,17 +726,10 @@ class EEPROM(object):
         if data_type == "s":
             if value is None:
                 value = ""
-            for i in range(min(length, len(value))):
-                if i < len(value):
-                    buf[start_byte + i] = ord(value[i])
-                else:
-                    buf[start_byte + i] = 0
+            encoded = value.encode("latin-1", "replace")[:length]
+            buf[start_byte:end_byte] = encoded.ljust(length, b"\x00")
         else:
-            struct.pack_into(data_type, buf, start_byte, value)
-
-        extra = "" if label is None else (" (%s)" % label)
-        # log.debug("Packed (%d, %2d, %2d) '%s' value %s -> %s%s", 
-        #     page, start_byte, length, data_type, value, buf[start_byte:end_byte], extra)
+            _STRUCTS[data_type].pack_into(buf, start_byte, value)
 
     ##
     # If asked to regenerate, return a digest of the contents that WOULD BE 
@@ -735,7 +751,7 @@ class EEPROM(object):
     def to_dict(self):
         d = {}
         for k, v in self.__dict__.items():
-            if k not in ["user_data", "buffers", "write_buffers", "editable"]:
+            if k not in ["user_data", "buffers", "write_buffers", "editable"] and not k.startswith("_"):
                 d[k] = v
         return d
 
@@ -743,26 +759,28 @@ class EEPROM(object):
     #
     # @note some callers may prefer SpectrometerSettings.to_dict() or to_json()
     def json(self, allow_nan=True):
-        tmp_buf  = self.buffers
-        tmp_data = self.user_data
-
-        self.buffers   = str(self.buffers)
-        self.user_data = str(self.user_data)
-
-        # this does take an allow_nan argument, but it throws an exception on NaN, 
-        # rather than replacing with null :-(
+        d = {}
+        for k, v in self.__dict__.items():
+            if k.startswith("_"):
+                continue
+            if k in ["buffers", "user_data"]:
+                v = str(v)
+            elif k == "write_buffers":
+                v = [ list(buf) for buf in v ]
+            elif not allow_nan:
+                v = _nan_to_none(v)
+            d[k] = v
+
+        # json.dumps does take an allow_nan argument, but it throws an exception 
+        # on NaN rather than replacing with null, hence _nan_to_none
         # https://stackoverflow.com/questions/6601812/sending-nan-in-json
-        s = json.dumps(self.__dict__, indent=2, sort_keys=True)
-        if not allow_nan:
-            s = re.sub(r"\bNaN\b", "null", s)
-
-        self.buffers   = tmp_buf
-        self.user_data = tmp_data
-
-        return s
+        return json.dumps(d, indent=2, sort_keys=True)
 
     ## log this object
     def dump(self):
+        if not log.isEnabledFor(logging.DEBUG):
+            return
+
         log.debug("EEPROM settings:")
         log.debug("  Model:            %s", self.model)
         log.debug("  Serial Number:    %s", self.serial_number)
@@ -886,12 +904,15 @@ class EEPROM(object):
         if not self.has_laser_power_calibration():
             return 0
 
-        perc = self.laser_power_coeffs[0] \
-             + self.laser_power_coeffs[1] * mW \
-             + self.laser_power_coeffs[2] * mW * mW \
-             + self.laser_power_coeffs[3] * mW * mW * mW
+        c = self.laser_power_coeffs
+        return ((c[3] * mW + c[2]) * mW + c[1]) * mW + c[0]
+
+    ## vectorized laser_power_mW_to_percent for an array of mW values (e.g. plotting)
+    def laser_power_mW_to_percent_array(self, mW):
+        if not self.has_laser_power_calibration():
+            return np.zeros(np.shape(mW))
 
-        return perc
+        return np.polyval(np.array(self.laser_power_coeffs[::-1], dtype=np.float64), mW)
 
     # ##########################################################################
     #                                                                          #
@@ -11,6 +11,8 @@ import usb.util
 import os
 import re
 
+import numpy as np
+
 from typing import TypeVar, Any, Callable
 from random import randint
 from time   import sleep
@@ -1102,10 +1104,10 @@ class FeatureIdentificationDevice(InterfaceDevice):
                         response.error_lvl = ErrorLevel.high
                     return response
 
-            # This is a convoluted way to iterate across the received bytes in 'data' as
-            # two interleaved arrays, both only processing alternating bytes, but one (i)
-            # starting at zero (even bytes) and the other (j) starting at 1 (odd bytes).
-            subspectrum = [int(i | (j << 8)) for i, j in zip(data[::2], data[1::2])] # LSB-MSB
+            # Pixels arrive as little-endian (LSB-MSB) uint16, the detector's native ADC
+            # width, so decode the whole block in one call rather than pairing bytes
+            # in Python.
+            subspectrum = np.frombuffer(data, dtype="<u2", count=len(data) // 2).tolist()
 
             spectrum.extend(subspectrum)
 
@@ -10,6 +10,8 @@ from typing import TypeVar, Any, Callable
 
 from configparser import ConfigParser
 
+import numpy as np
+
 from . import utils
 
 from .FeatureIdentificationDevice import FeatureIdentificationDevice
@@ -765,11 +767,14 @@ class WasatchDevice(InterfaceDevice):
             if not reading.failure:
                 if averaging_enabled:
                     if self.sum_count == 0:
-                        self.summed_spectra = [float(i) for i in reading.spectrum]
+                        # reuse one float64 accumulator for every average
+                        pixels = len(reading.spectrum)
+                        if self.summed_spectra is None or len(self.summed_spectra) != pixels:
+                            self.summed_spectra = np.empty(pixels, dtype=np.float64)
+                        self.summed_spectra[:] = reading.spectrum
                     else:
                         log.debug("device.take_one_averaged_reading: summing spectra")
-                        for i in range(len(self.summed_spectra)):
-                            self.summed_spectra[i] += reading.spectrum[i]
+                        self.summed_spectra += reading.spectrum
                     self.sum_count += 1
                     log.debug("device.take_one_averaged_reading: summed_spectra : %s ...", self.summed_spectra[0:9])
 
@@ -781,12 +786,11 @@ class WasatchDevice(InterfaceDevice):
             # have we completed the averaged reading?
             if averaging_enabled:
                 if self.sum_count >= self.settings.state.scans_to_average:
-                    reading.spectrum = [ x / self.sum_count for x in self.summed_spectra ]
+                    reading.spectrum = (self.summed_spectra / self.sum_count).tolist()
                     log.debug("device.take_one_averaged_reading: averaged_spectrum : %s ...", reading.spectrum[0:9])
                     reading.averaged = True
 
-                    # reset for next average
-                    self.summed_spectra = None
+                    # reset for next average (the accumulator itself is kept)
                     self.sum_count = 0
             else:
                 # if averaging isn't enabled...then a single reading is the
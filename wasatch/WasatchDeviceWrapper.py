@@ -1,23 +1,14 @@
-import sys
-import pdb
-import time
 import random
 import logging
 import datetime
 import threading
 
-from queue import Queue
+from queue import Queue, SimpleQueue
+from collections import deque
 
-from . import applog
-from . import utils
-
-from .SpectrometerSettings import SpectrometerSettings
 from .SpectrometerResponse import SpectrometerResponse
-from .SpectrometerResponse import ErrorLevel
 from .ControlObject        import ControlObject
 from .WrapperWorker        import WrapperWorker
-from .BLEDevice            import BLEDevice
-from .Reading              import Reading
 
 log = logging.getLogger(__name__)
 
@@ -142,6 +133,14 @@ class WasatchDeviceWrapper:
 
     DISABLE_RESPONSE_QUEUE = False
 
+    ## Readings buffered between the worker thread and the caller; once full,
+    #  the oldest plain Reading is dropped (completed averages, errors and
+    #  poison-pills are kept in response_overflow instead)
+    RESPONSE_RING_SIZE = 64
+
+    ## longest disconnect() will wait for the worker thread to exit
+    DISCONNECT_TIMEOUT_SEC = 0.1
+
     # ##########################################################################
     #                                                                          #
     #                             Parent Thread                                #
@@ -161,15 +160,7 @@ class WasatchDeviceWrapper:
         self.device_id = device_id
         self.log_level = log_level
 
-        self.settings_queue = False
-        self.response_queue = False
-        self.message_queue = False
-        self.command_queue = False
-
-        self.settings_queue = Queue() # spectrometer -> GUI (SpectrometerSettings, one-time)
-        self.response_queue = Queue() # spectrometer -> GUI (Readings)
-        self.message_queue  = Queue() # spectrometer -> GUI (StatusMessages)
-        self.command_queue  = Queue() # GUI -> spectrometer (ControlObjects)
+        self.create_channels()
 
         self.connected    = False
         self.closing      = False   # Don't permit new acquires during close
@@ -190,6 +181,19 @@ class WasatchDeviceWrapper:
 
         self.reset_tries = 0
 
+    ##
+    # Create the channels shared with the WrapperWorker thread.  A fresh set
+    # is created on disconnect, so a worker still finishing its last
+    # acquisition can't feed stale Readings into (or drain commands from)
+    # a subsequent connection.
+    def create_channels(self):
+        self.settings_queue = SimpleQueue() # spectrometer -> GUI (SpectrometerSettings, one-time)
+        self.response_queue = deque(maxlen=self.RESPONSE_RING_SIZE) # spectrometer -> GUI (Readings)
+        self.response_overflow = deque() # spectrometer -> GUI (responses which must not be dropped)
+        self.message_queue  = Queue() # spectrometer -> GUI (StatusMessages)
+        self.command_queue  = deque() # GUI -> spectrometer (ControlObjects)
+        self.command_event  = threading.Event() # wakes the worker when a command is queued
+
     ##
     # Create a low level device object with the specified identifier, kick off
     # the child thread to attempt to read from it.
@@ -208,6 +212,8 @@ class WasatchDeviceWrapper:
     # Wrapper to the calling Controller.  This is the primary way the
     # Controller knows what kind of spectrometer it has connected to,
     # what hardware features and EEPROM settings are applied etc.
+    # As it only ever carries that one handshake, it is a SimpleQueue
+    # (no task tracking or maxsize bookkeeping).
     #
     # Thereafter both WasatchDevice and Controller will maintain
     # their own copies of SpectrometerSettings, and they are not
@@ -224,6 +230,10 @@ class WasatchDeviceWrapper:
     # time), meta-commands to the WasatchDevice class (scan averaging),
     # or EEPROM updates.
     #
+    # Like response_queue this is a collections.deque (single producer,
+    # single consumer), paired with command_event so the worker wakes as
+    # soon as something is appended.
+    #
     # @par response_queue
     #
     # The WasatchDevice will stream a continuous series of Reading
@@ -233,6 +243,13 @@ class WasatchDeviceWrapper:
     # time, laser power), plus additional readings from the spectrometer
     # (detector and laser temperature, secondary ADC).
     #
+    # This is a bounded ring (collections.deque) rather than a Queue: the
+    # worker appends and the Controller pops without taking a lock per
+    # Reading.  If the Controller falls behind, the worker evicts the oldest
+    # entry: plain Readings are dropped (with a warning), while completed
+    # averages, errors and poison-pills move to the unbounded
+    # response_overflow, which get_final_item() drains first.
+    #
     def connect(self):
 
         # instantiate thread
@@ -243,29 +260,24 @@ class WasatchDeviceWrapper:
             response_queue = self.response_queue, # Main <-- child \
             settings_queue = self.settings_queue, # Main <-- child / consolidate into SpectrometerMessage?
             message_queue  = self.message_queue,
+            command_event  = self.command_event,
+            response_overflow = self.response_overflow,
             is_ocean       = self.is_ocean,
             is_andor       = self.is_andor,
             is_spi         = self.is_spi,
             is_ble         = self.is_ble)
         log.debug("device wrapper: Instance created for worker")
 
-        self.wrapper_worker.setDaemon(True)
+        self.wrapper_worker.daemon = True
         log.debug("deivce wrapper: Initiating wrapper thread")
 
         self.wrapper_worker.start()
 
-        # If something goes wrong, we won't want to kill the current thread (this
-        # function runs within MainProcess), but we will want to kill the spawned 
-        # child, and ensure 'self' (the current WasatchDeviceWrapper instance) is 
-        # ready for clean destruction (otherwise we'd be leaking resources 
-        # continuously).
-        kill_myself = False
-
-        # expect to read a single post-initialization SpectrometerSettings object off the queue
+        # Don't wait here for the worker to connect: the single post-initialization
+        # SpectrometerSettings object will arrive on settings_queue, which the
+        # Controller checks via poll_settings().
         self.connect_start_time = datetime.datetime.now()
         self.settings = None
-        log.debug("connect: blocking on settings_queue (waiting on child thread to send SpectrometerSettings)")
-
         log.debug("connect: setup connection, returning to controller for settings polling")
 
         return True
@@ -295,27 +307,34 @@ class WasatchDeviceWrapper:
     def reset(self):
         if "USB" in str(self.device_id):
             self.reset_tries += 1
-            self.command_queue.put(ControlObject("reset", None))
+            self.command_queue.append(ControlObject("reset", None))
+            self.command_event.set()
 
     def disconnect(self):
         # send poison pill to the child
         self.closing = True
         log.debug("disconnect: sending poison pill downstream")
         try:
-            self.command_queue.put(None) 
+            self.command_queue.append(None) 
+            self.command_event.set()
         except:
             pass
-        time.sleep(0.1)
+
+        # The worker wakes on command_event, so it normally exits (after relaying
+        # the pill to the device) well within the timeout; it is only still alive
+        # if it is blocked in a long acquisition, in which case it will exit
+        # at the end of that.
+        worker = self.wrapper_worker
+        if worker is not None and worker.is_alive():
+            worker.join(timeout=self.DISCONNECT_TIMEOUT_SEC)
+            if worker.is_alive():
+                log.debug("disconnect: worker still busy, leaving it to exit on its own")
         log.debug("disconnect: done")
         del self.wrapper_worker
 
         self.connected = False
 
-        # MZ: why do we recreate these?
-        self.settings_queue = Queue()
-        self.response_queue = Queue()
-        self.message_queue  = Queue()
-        self.command_queue  = Queue()
+        self.create_channels()
 
         return True
 
@@ -361,6 +380,23 @@ class WasatchDeviceWrapper:
         if mode is None or mode == self.ACQUISITION_MODE_KEEP_COMPLETE:
             return self.get_final_item(keep_averaged=True)
 
+        # Otherwise just take the NEWEST spectrum, averaged or not, purging the
+        # queue (poison-pills and errors are still flowed up).
+        if mode == self.ACQUISITION_MODE_LATEST:
+            return self.get_final_item(keep_averaged=False)
+
+    ##
+    # Yield pending responses oldest-first: anything evicted into
+    # response_overflow, then the ring.  The worker may also pop from a full
+    # ring, so an empty popleft() (rather than a length check) ends each.
+    def pop_responses(self):
+        for q in (self.response_overflow, self.response_queue):
+            while True:
+                try:
+                    yield q.popleft()
+                except IndexError:
+                    break
+
     ## Read from the response queue until empty (or we find an averaged item)
     #
     # In the currently implementation, it seems unlikely that a "True" will ever
@@ -369,22 +405,16 @@ class WasatchDeviceWrapper:
         last_reading  = SpectrometerResponse()
         last_averaged = SpectrometerResponse()
         dequeue_count = 0
+        debug         = log.isEnabledFor(logging.DEBUG)
 
         # kludge - memory profiling
         if WasatchDeviceWrapper.DISABLE_RESPONSE_QUEUE and self.previous_reading is not None:
             self.previous_reading.spectrum = [(1.1 - 0.2 * random.random()) * x for x in self.previous_reading.spectrum]
             return self.previous_reading
 
-        while True:
-            # without waiting (don't block), just get the first item off the
-            # queue if there is one
-            wrapper_reading = SpectrometerResponse()
-            if not self.response_queue.empty():
-                wrapper_reading = self.response_queue.get_nowait()
-            else:
-                # If there is nothing more to read, then we've emptied the queue
-                # log.debug("get_final has nothing more to read, sending up readings")
-                break
+        # Without waiting (don't block), take items off the overflow and then
+        # the ring until both are empty.
+        for wrapper_reading in self.pop_responses():
 
             # If we come across a keep_alive, ignore it for the moment.
             # for now continue cleaning-out the queue.
@@ -393,7 +423,8 @@ class WasatchDeviceWrapper:
                 if wrapper_reading.keep_alive and wrapper_reading.error_msg:
                     last_reading = wrapper_reading
                     break
-                log.debug("get_final_item: ignoring keepalive")
+                if debug:
+                    log.debug("get_final_item: ignoring keepalive")
                 continue
 
             # If we come across a poison-pill, flow that up immediately --
@@ -403,7 +434,8 @@ class WasatchDeviceWrapper:
                 return wrapper_reading
 
             # apparently we read a Reading
-            log.debug("get_final_item: read Reading %s", str(wrapper_reading.data.session_count))
+            if debug:
+                log.debug("get_final_item: read Reading %s", wrapper_reading.data.session_count)
             last_reading = wrapper_reading
             dequeue_count += 1
 
@@ -428,7 +460,7 @@ class WasatchDeviceWrapper:
 
         # apparently we read at least some readings.  For interest, how how many
         # readings did we throw away (not return up to ENLIGHTEN)?
-        if dequeue_count > 1:
+        if debug and dequeue_count > 1:
             log.debug("discarded %d readings", dequeue_count - 1)
 
         # if we're doing averaging, and we found one or more averaged readings,
@@ -471,7 +503,8 @@ class WasatchDeviceWrapper:
             log.debug("change_setting: %s => %s", setting, value)
             control_object = ControlObject(setting, value)
 
-            self.command_queue.put(control_object)
+            self.command_queue.append(control_object)
+            self.command_event.set()
 
             return
         except Exception as e:
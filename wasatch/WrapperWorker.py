@@ -2,11 +2,10 @@ import threading
 import datetime
 import logging
 import time
-from queue import Queue
+from collections import OrderedDict, deque
 
 from .SpectrometerResponse import SpectrometerResponse
 from .SpectrometerRequest  import SpectrometerRequest
-from .SpectrometerResponse import ErrorLevel
 from .WasatchDevice        import WasatchDevice
 from .ControlObject        import ControlObject
 from .AndorDevice          import AndorDevice
@@ -17,6 +16,32 @@ from .Reading              import Reading
 
 log = logging.getLogger(__name__)
 
+##
+# Drain every ControlObject currently on the queue, keeping only the most
+# recent command for each setting (in the order those were queued).  None
+# elements (poison pills) are treated the same as everything else.
+def drain_commands(q: deque) -> list[ControlObject]:
+    keep = OrderedDict() # setting -> most recent ControlObject, in arrival order
+    while q:
+        control_object = q.popleft()
+
+        setting = None if control_object is None else control_object.setting
+
+        # re-inserting moves the setting to the end, superseding any previous command
+        keep.pop(setting, None)
+        keep[setting] = control_object
+
+    return list(keep.values())
+
+##
+# Whether a response may be discarded when the response ring is full: plain
+# (non-averaged) Readings and keepalives may, while completed averages, errors
+# and poison-pills may not.
+def is_droppable(response: SpectrometerResponse) -> bool:
+    if response.poison_pill or response.error_msg:
+        return False
+    return not getattr(response.data, "averaged", False)
+
 ##
 # Continuously process in background thread. While waiting forever for the None 
 # poison pill on the command queue, continuously read from the device and post 
@@ -28,11 +53,22 @@ log = logging.getLogger(__name__)
 # handle the threads.
 class WrapperWorker(threading.Thread):
 
+    # Each worker starts at most one acquisition per tick of POLLER_WAIT_SEC *
+    # num_connected_devices (20Hz with a single spectrometer).  The tick is
+    # measured from the START of each acquisition, so it is a minimum period
+    # rather than a wait added to every integration: shorter acquisitions are
+    # spaced out to the tick, while integrations of at least 50ms * N run
+    # back-to-back with no idle gap.
+    #
+    # With several spectrometers connected, the longer tick is what throttles
+    # each worker's USB traffic, leaving the bus to the others between its
+    # acquisitions.  That only holds while integrations are shorter than the
+    # tick: a spectrometer integrating for 50ms * N or longer no longer idles
+    # between acquisitions, and gives up no bus time to the others.
+    #
     # TODO: make this dynamic:
     #   - initially on number of connected spectrometers
     #   - ideally on configured integration times per spectrometer
-    #   - note that this is essentially ADDED to the total measurement time
-    #     of EACH AND EVERY INTEGRATION
     # TODO: replace if check for each type of spec with single call
     # TODO: Create ABC of hardware device that keeps common functions like handle_requests
     POLLER_WAIT_SEC = 0.05    # .05sec = 50ms = update from hardware device at 20Hz
@@ -48,6 +84,8 @@ class WrapperWorker(threading.Thread):
             is_andor,
             is_spi,
             is_ble,
+            command_event=None,
+            response_overflow=None,
             parent=None):
 
         threading.Thread.__init__(self)
@@ -59,11 +97,34 @@ class WrapperWorker(threading.Thread):
         self.is_ble         = is_ble
         self.command_queue  = command_queue
         self.response_queue = response_queue
+        self.response_overflow = response_overflow if response_overflow is not None else deque()
         self.settings_queue = settings_queue
         self.message_queue  = message_queue
+        self.command_event  = command_event if command_event is not None else threading.Event()
         self.wasatch_device = False
         self.sum_count = 0
 
+    ##
+    # Relay a response to the caller.  If the caller has stopped polling and the
+    # response ring is full, evict its oldest entry first: plain Readings are
+    # dropped, but anything else moves to response_overflow, which is unbounded
+    # and drained ahead of the ring, so completed averages, errors and
+    # poison-pills are never lost.
+    def send_response(self, response):
+        ring = self.response_queue
+        if ring.maxlen is not None and len(ring) >= ring.maxlen:
+            try:
+                oldest = ring.popleft()
+            except IndexError:
+                oldest = None # the caller drained the ring meanwhile
+
+            if oldest is not None:
+                if is_droppable(oldest):
+                    log.warning("response ring full: dropped Reading %s", getattr(oldest.data, "session_count", None))
+                else:
+                    self.response_overflow.append(oldest)
+        ring.append(response)
+
     ##
     # This is essentially the main() loop in a thread.
     # All communications with the parent thread are routed through
@@ -116,9 +177,11 @@ class WrapperWorker(threading.Thread):
         received_poison_pill_response = False # from WasatchDevice
 
         num_connected_devices = 1
+        next_tick = time.monotonic()
         while True:
             now = datetime.datetime.now()
-            dedupped = self.dedupe(self.command_queue)
+            debug = log.isEnabledFor(logging.DEBUG)
+            dedupped = drain_commands(self.command_queue)
 
             # apply dedupped commands
             if dedupped:
@@ -137,7 +200,8 @@ class WrapperWorker(threading.Thread):
                         # laser etc in due sequence.  We can break AFTER relaying
                         # applying the queued settings.
                     else:
-                        log.debug("processing command queue: %s", record.setting)
+                        if debug:
+                            log.debug("processing command queue: %s", record.setting)
 
                         last_command = now
 
@@ -157,7 +221,8 @@ class WrapperWorker(threading.Thread):
                             thread_timeout_sec = record.value
 
             else:
-                log.debug("command queue empty")
+                if debug:
+                    log.debug("command queue empty")
 
             if received_poison_pill_command:
                 # ...NOW we can break
@@ -168,6 +233,18 @@ class WrapperWorker(threading.Thread):
                 self.connected_device.handle_requests([req]) 
                 break
 
+            # only poll hardware buses at 20Hz.  A queued command wakes us early
+            # so it is applied immediately, but we then resume waiting until the
+            # tick deadline rather than acquiring per command.
+            remaining_sec = next_tick - time.monotonic()
+            if remaining_sec > 0:
+                if debug:
+                    log.debug("waiting up to %.3f sec", remaining_sec)
+                self.command_event.wait(remaining_sec)
+                self.command_event.clear()
+                continue
+            next_tick = time.monotonic() + WrapperWorker.POLLER_WAIT_SEC * num_connected_devices
+
             # ##################################################################
             # Relay one upstream reading (Spectrometer -> GUI)
             # ##################################################################
@@ -176,7 +253,8 @@ class WrapperWorker(threading.Thread):
                 # Note: this is a BLOCKING CALL.  If integration time is longer
                 # than subprocess_timeout_sec, this call itself will trigger
                 # shutdown.
-                log.debug("acquiring data")
+                if debug:
+                    log.debug("acquiring data")
                 req = SpectrometerRequest("acquire_data")
                 (reading_response,) = self.connected_device.handle_requests([req])
                 #log.debug("continuous_poll: acquire_data returned %s", str(reading))
@@ -186,49 +264,45 @@ class WrapperWorker(threading.Thread):
             if not isinstance(reading_response, SpectrometerResponse):
                 log.error(f"Reading is not type ReadingResponse. Should not get naked responses. Happened with request {req}")
                 continue
-            log.debug(f"response {reading_response} data is {reading_response.data}")
+            if debug:
+                log.debug("response %s data is %s", reading_response, reading_response.data)
 
             if reading_response.keep_alive == True:
-                log.debug("worker is flowing up keep_alive")
-                self.response_queue.put(reading_response) 
+                if debug:
+                    log.debug("worker is flowing up keep_alive")
+                self.send_response(reading_response) 
 
             elif reading_response.error_msg != "":
                 if reading_response.data == None:
                     reading_response.data = Reading()
-                self.response_queue.put(reading_response)
+                self.send_response(reading_response)
 
             elif reading_response.data is None:
-                log.debug("worker saw no reading (but not error, either)")
+                if debug:
+                    log.debug("worker saw no reading (but not error, either)")
 
             elif reading_response.data == False:
                 log.critical(f"hardware level error...exiting because data False")
                 reading_response.poison_pill = True
-                self.response_queue.put(reading_response)
+                self.send_response(reading_response)
 
             elif reading_response.data.failure is not None:
                 log.critical(f"hardware level error...exiting because failure {reading_response.data.failure}")
                 reading_response.poison_pill = True
-                self.response_queue.put(reading_response)
+                self.send_response(reading_response)
 
             elif reading_response.poison_pill:
                 log.critical(f"hardware level error...exiting because poison-pill")
-                self.response_queue.put(reading_response)
+                self.send_response(reading_response)
 
             elif reading_response.data.spectrum is not None:
-                log.debug("sending Reading %d back to GUI thread (%s)", reading_response.data.session_count, reading_response.data.spectrum[0:5])
-                try:
-                    self.response_queue.put_nowait(reading_response) 
-                except:
-                    log.error("unable to push Reading %d to GUI", reading_response.data.session_count, exc_info=1)
+                if debug:
+                    log.debug("sending Reading %d back to GUI thread (%s)", reading_response.data.session_count, reading_response.data.spectrum[0:5])
+                self.send_response(reading_response) 
 
             else:
                 log.error("received non-failure Reading without spectrum...ignoring?")
 
-            # only poll hardware buses at 20Hz
-            sleep_sec = WrapperWorker.POLLER_WAIT_SEC * num_connected_devices
-            log.debug("sleeping %.2f sec", sleep_sec)
-            time.sleep(sleep_sec)
-
         ########################################################################
         # we have exited the loop
         ########################################################################
@@ -239,30 +313,3 @@ class WrapperWorker(threading.Thread):
             log.critical("exiting for no reason?!")
 
         log.critical("done")
-
-    def dedupe(self, q: Queue) -> list[ControlObject]:
-        keep = [] # list, not a set, because we want to keep it ordered
-        while True:
-            if not q.empty():
-                control_object = q.get_nowait() 
-
-                # treat None elements (poison pills) same as everything else
-                if control_object is None:
-                    setting = None
-                    value = None
-                else:
-                    setting = control_object.setting
-                    value = control_object.value
-
-                # remove previous setting if duplicate
-                new_keep = []
-                for co in keep:
-                    if co.setting != setting:
-                        new_keep.append(co)
-                keep = new_keep
-
-                # append the setting to the de-dupped list and track index
-                keep.append(control_object)
-            else:
-                break
-        return keep
@@ -456,30 +456,25 @@ def coeffs_look_valid(coeffs, count=None):
         log.debug("coeff count is wrong, returning False")
         return False
 
+    a = numpy.asarray(coeffs, dtype=numpy.float64)
+    if len(a) < 2:
+        log.debug("too few coeffs, returning False")
+        return False
+
     # check for NaN
-    for i in range(len(coeffs)):
-        if math.isnan(coeffs[i]):
-            log.debug("found NaN in coeff, returning False")
-            return False 
+    if numpy.isnan(a).any():
+        log.debug("found NaN in coeff, returning False")
+        return False 
 
     # check for [0, 1, 0...] default pattern
-    all_default = True
-    for i in range(len(coeffs)):
-        if i == 1 and coeffs[i] != 1.0:
-            all_default = False
-        elif coeffs[i] != 0.0:
-            all_default = False
-    if all_default:
-        log.debug("coeffs all default, reutrning False")
+    default = numpy.zeros(len(a))
+    default[1] = 1.0
+    if numpy.array_equal(a, default):
+        log.debug("coeffs all default, returning False")
         return False
 
     # check for constants (all coefficients the same value)
-    all_const = True
-    log.info(coeffs)
-    for i in range(1, len(coeffs)):
-        if coeffs[0] != coeffs[i]:
-            all_const = False
-    if all_const:
+    if (a == a[0]).all():
         log.debug("coeffs all const, returning False")
         return False
 